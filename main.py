@@ -3,10 +3,14 @@ Error Log Classifier - Main Application
 Groups similar error log lines, extracts signatures, and generates reports.
 """
 
+import gc
+import os
 import sys
 import argparse
-import json
-import gc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
@@ -17,19 +21,40 @@ from src.clustering import ErrorClusterer
 from src.report_generator import ReportGenerator
 from src.export_handler import ExportHandler
 from src.diff_analyzer import DiffAnalyzer
+from src import json_utils
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Disable the cyclic garbage collector for a bulk phase.
+    
+    Clustering allocates millions of small tuples that all stay alive, so
+    the collector's periodic scans would free nothing. Reference counting
+    still frees everything that is not part of a cycle.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
 
 
 class ErrorLogClassifier:
     """Main application class for error log analysis."""
     
-    def __init__(self, chunk_size=1000):
+    def __init__(self, chunk_size=1000, workers=1):
         """
         Initialize the classifier.
         
         Args:
-            chunk_size (int): Lines to process before memory cleanup
+            chunk_size (int): Lines per signature extraction batch
+            workers (int): Processes used for signature extraction (0 for all CPUs)
         """
         self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
         self.log_processor = LogProcessor(chunk_size=chunk_size)
         self.signature_extractor = SignatureExtractor()
         self.clusterer = ErrorClusterer()
@@ -37,7 +62,8 @@ class ErrorLogClassifier:
         self.export_handler = ExportHandler()
     
     def analyze_log_file(self, filepath, max_lines=None, include_filter=None, 
-                        exclude_filter=None, keywords=None, time_bucket=None):
+                        exclude_filter=None, keywords=None, time_bucket=None,
+                        merge_threshold=None):
         """
         Analyze a single log file.
         
@@ -48,6 +74,8 @@ class ErrorLogClassifier:
             exclude_filter (str): Regex to exclude lines
             keywords (list): Keywords that must appear
             time_bucket (int): Minutes per time bucket
+            merge_threshold (float): Merge clusters with signatures at least
+                this similar (None to keep exact-signature clusters)
             
         Returns:
             dict: Analysis report
@@ -56,46 +84,166 @@ class ErrorLogClassifier:
         print(f"Analyzing: {filepath}")
         print(f"{'='*70}")
         
-        # Step 1: Read logs
+        clusters, stats = self.cluster_log_file(
+            filepath,
+            max_lines=max_lines,
+            include_filter=include_filter,
+            exclude_filter=exclude_filter,
+            keywords=keywords
+        )
+        
+        if merge_threshold is not None:
+            print("Step 3b: Merging similar clusters...")
+            clusters = self.clusterer.merge_similar_clusters(clusters, merge_threshold)
+            self.clusterer.clusters = clusters
+            self.clusterer.cluster_count = len(clusters)
+        
+        # Step 4: Generate report (stats were filled in during the read)
+        print("Step 4: Generating report...")
+        report = self.report_gen.generate_summary(clusters, stats=stats)
+        
+        # Display summary
+        self._display_summary(report)
+        
+        return report, clusters
+    
+    def cluster_log_file(self, filepath, max_lines=None, include_filter=None,
+                         exclude_filter=None, keywords=None, start_offset=0,
+                         end_offset=None, first_line_num=0):
+        """
+        Read, filter and cluster a log file (or a byte range of it).
+        
+        Args:
+            filepath (str): Path to log file
+            max_lines (int): Max lines to read
+            include_filter (str): Regex to include lines
+            exclude_filter (str): Regex to exclude lines
+            keywords (list): Keywords that must appear
+            start_offset (int): Byte offset to start reading at
+            end_offset (int): Byte offset to stop reading at (None for EOF)
+            first_line_num (int): Line number given to the first line read
+            
+        Returns:
+            tuple: (clusters, stats)
+        """
         print("Step 1: Reading log file...")
-        logs = self.log_processor.read_logs(filepath, max_lines=max_lines)
+        if include_filter or exclude_filter or keywords:
+            print("Step 2: Filtering logs...")
+        print("Step 3: Extracting signatures and clustering...")
+        
+        if self.workers > 1 and not max_lines:
+            return self._cluster_parallel(
+                filepath, include_filter, exclude_filter, keywords,
+                start_offset, end_offset, first_line_num
+            )
+        
+        return self._cluster_range(
+            filepath, include_filter, exclude_filter, keywords,
+            start_offset, end_offset, first_line_num, max_lines=max_lines
+        )
+    
+    def _cluster_range(self, filepath, include_filter, exclude_filter, keywords,
+                       start_offset, end_offset, first_line_num, max_lines=None):
+        """Read, filter and cluster one byte range; returns (clusters, stats)."""
+        # Step 1: Read logs
+        # Statistics are accumulated while the lines stream through the
+        # pipeline, so the file is read once and never held in memory
+        stats = {}
+        logs = self.log_processor.track_stats(
+            self.log_processor.read_logs(
+                filepath,
+                max_lines=max_lines,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                first_line_num=first_line_num
+            ),
+            stats
+        )
         
         # Step 2: Filter logs if needed
         if include_filter or exclude_filter or keywords:
-            print("Step 2: Filtering logs...")
+            # Compile the filters once up front rather than per call
+            include_re = self.log_processor.compile_pattern(include_filter) if include_filter else None
+            exclude_re = self.log_processor.compile_pattern(exclude_filter) if exclude_filter else None
             logs = self.log_processor.filter_logs(
                 logs,
-                pattern=include_filter,
-                exclude_pattern=exclude_filter,
-                error_keywords=keywords
+                pattern=include_re,
+                exclude_pattern=exclude_re,
+                error_keywords=frozenset(k.lower() for k in keywords) if keywords else None
             )
         
         # Step 3: Extract signatures and cluster
-        print("Step 3: Extracting signatures and clustering...")
-        lines_with_signatures = [
-            (line_num, line, self.signature_extractor.get_signature(line))
-            for line_num, line, _ in logs
-        ]
+        lines_with_signatures = self.extract_signatures(logs)
         
-        # Force garbage collection periodically
-        if len(lines_with_signatures) % self.chunk_size == 0:
-            gc.collect()
+        with _gc_paused():
+            clusters = self.clusterer.cluster_by_signature(lines_with_signatures)
         
-        clusters = self.clusterer.cluster_by_signature(lines_with_signatures)
+        return clusters, stats
+    
+    def _cluster_parallel(self, filepath, include_filter, exclude_filter, keywords,
+                          start_offset, end_offset, first_line_num):
+        """
+        Cluster a file by splitting it into line-aligned byte ranges and
+        processing them in separate processes, sidestepping the GIL on the
+        regex-heavy signature extraction.
         
-        # Step 4: Get statistics
-        print("Step 4: Calculating statistics...")
-        logs_for_stats = self.log_processor.read_logs(filepath, max_lines=max_lines)
-        stats = self.log_processor.get_stats(logs_for_stats)
+        Returns:
+            tuple: (clusters, stats), identical to a single-process run
+        """
+        ranges = self.log_processor.split_ranges(
+            filepath, self.workers, start_offset, end_offset
+        )
+        if len(ranges) < 2:
+            return self._cluster_range(
+                filepath, include_filter, exclude_filter, keywords,
+                start_offset, end_offset, first_line_num
+            )
         
-        # Step 5: Generate report
-        print("Step 5: Generating report...")
-        report = self.report_gen.generate_summary(clusters, stats=stats)
+        tasks = [
+            (filepath, include_filter, exclude_filter, keywords, start, end, 0)
+            for start, end in ranges
+        ]
         
-        # Display summary
-        self._display_summary(report)
+        clusters = defaultdict(list)
+        stats = None
+        line_offset = first_line_num
+        settings = (self.chunk_size, self.log_processor.read_buffer, self.log_processor.read_depth)
+        with ProcessPoolExecutor(max_workers=len(ranges), initializer=_init_cluster_worker,
+                                 initargs=settings) as pool, _gc_paused():
+            # Each range numbers its lines from zero; shift them into place
+            for part_clusters, part_stats in pool.map(_cluster_range_worker, tasks):
+                for signature, lines in part_clusters.items():
+                    clusters[signature].extend(
+                        (line_num + line_offset, line) for line_num, line in lines
+                    )
+                line_offset += part_stats['total_lines']
+                stats = part_stats if stats is None else self.log_processor.merge_stats(stats, part_stats)
         
-        return report, clusters
+        self.clusterer.clusters = clusters
+        self.clusterer.cluster_count = len(clusters)
+        return clusters, stats
+    
+    def extract_signatures(self, logs):
+        """
+        Attach signatures to logs, extracting them a chunk at a time.
+        
+        Args:
+            logs (iterable): Iterator of (line_num, line, timestamp) tuples
+            
+        Yields:
+            tuple: (line_num, line, signature)
+        """
+        logs = iter(logs)
+        while True:
+            chunk = list(islice(logs, self.chunk_size))
+            if not chunk:
+                break
+            
+            signatures = self.signature_extractor.get_signatures_bulk(
+                line for _, line, _ in chunk
+            )
+            for (line_num, line, _), signature in zip(chunk, signatures):
+                yield line_num, line, signature
     
     def export_results(self, report, output_dir, base_name="error_analysis"):
         """
@@ -114,28 +262,47 @@ class ErrorLogClassifier:
         output_path.mkdir(parents=True, exist_ok=True)
         
         # Use fixed filenames instead of timestamps - this allows outputs to update
-        exported_files = {}
+        paths = {
+            'csv': output_path / f"{base_name}.csv",
+            'json': output_path / f"{base_name}.json",
+            'html': output_path / f"{base_name}.html",
+        }
+        if not report['top_clusters']:
+            del paths['csv']  # Nothing to tabulate
         
-        # Export CSV
-        csv_path = output_path / f"{base_name}.csv"
-        result = self.export_handler.export_csv(report, str(csv_path))
-        if result:
-            exported_files['csv'] = result
-            print(f"✓ CSV exported to: {result}")
-        
-        # Export JSON
-        json_path = output_path / f"{base_name}.json"
-        result = self.export_handler.export_json(report, str(json_path))
-        if result:
-            exported_files['json'] = result
-            print(f"✓ JSON exported to: {result}")
-        
-        # Export HTML
-        html_path = output_path / f"{base_name}.html"
-        result = self.export_handler.export_html(report, str(html_path))
-        if result:
-            exported_files['html'] = result
-            print(f"✓ HTML exported to: {result}")
+        # Each format succeeds or fails on its own; a file that cannot be
+        # opened is skipped and the others are still written
+        errors = {}
+        files = {}
+        for fmt, path in paths.items():
+            try:
+                files[fmt] = open(path, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None)
+            except Exception as e:
+                errors[fmt] = e
+        
+        # Write all remaining formats in one pass over the clusters
+        try:
+            errors.update(self.export_handler.export_all(
+                report, files.get('csv'), files.get('json'), files.get('html')
+            ))
+        except Exception as e:
+            # Not a write error (e.g. a malformed report): fails every format
+            for fmt in files:
+                errors.setdefault(fmt, e)
+        finally:
+            for fmt, f in files.items():
+                try:
+                    f.close()
+                except Exception as e:
+                    errors.setdefault(fmt, e)
+        
+        exported_files = {}
+        for fmt, path in paths.items():
+            if fmt in errors:
+                print(f"Error writing {fmt.upper()} file: {errors[fmt]}")
+            else:
+                exported_files[fmt] = str(path)
+                print(f"✓ {fmt.upper()} exported to: {path}")
         
         return exported_files
     
@@ -156,11 +323,11 @@ class ErrorLogClassifier:
         print(f"{'='*70}")
         
         # Load reports
-        with open(baseline_path, 'r') as f:
-            baseline = json.load(f)
+        with open(baseline_path, 'rb') as f:
+            baseline = json_utils.load(f)
         
-        with open(current_path, 'r') as f:
-            current = json.load(f)
+        with open(current_path, 'rb') as f:
+            current = json_utils.load(f)
         
         # Analyze diff
         analyzer = DiffAnalyzer()
@@ -202,6 +369,22 @@ class ErrorLogClassifier:
                 print(f"{i}. [{cluster['count']}] {cluster['signature'][:60]}")
 
 
+_worker_classifier = None
+
+
+def _init_cluster_worker(chunk_size, read_buffer, read_depth):
+    """Process pool initializer: build a classifier with the parent's settings."""
+    global _worker_classifier
+    _worker_classifier = ErrorLogClassifier(chunk_size=chunk_size)
+    _worker_classifier.log_processor.read_buffer = read_buffer
+    _worker_classifier.log_processor.read_depth = read_depth
+
+
+def _cluster_range_worker(task):
+    """Process pool entry point: cluster one byte range of a log file."""
+    return _worker_classifier._cluster_range(*task)
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -231,6 +414,11 @@ Examples:
     analyze_parser.add_argument('-e', '--exclude', help='Regex pattern to exclude lines')
     analyze_parser.add_argument('-k', '--keywords', nargs='+', help='Keywords that must appear')
     analyze_parser.add_argument('-t', '--time-bucket', type=int, help='Time bucket in minutes')
+    analyze_parser.add_argument('-w', '--workers', type=int, default=1,
+                                help='Processes for signature extraction (0 for all CPUs)')
+    analyze_parser.add_argument('--merge-similar', type=float, nargs='?', const=0.7,
+                                metavar='THRESHOLD',
+                                help='Merge clusters with similar signatures (0-1, default 0.7)')
     
     # Diff command
     diff_parser = subparsers.add_parser('diff', help='Compare two analysis runs')
@@ -266,7 +454,7 @@ FEATURES:
   • Regression tracking via diff analysis
 
 MEMORY EFFICIENCY:
-  • Processes logs in chunks with garbage collection
+  • Extracts signatures in chunks; GC paused while clustering
   • Streaming file reading (not loading entire file)
   • Configurable chunk sizes for different systems
   
@@ -298,7 +486,11 @@ DATA FLOW:
         """)
     
     elif args.command == 'analyze':
-        classifier = ErrorLogClassifier()
+        classifier = ErrorLogClassifier(workers=args.workers)
+        
+        if args.merge_similar is not None and not 0 < args.merge_similar <= 1:
+            print("Error: --merge-similar threshold must be between 0 and 1")
+            sys.exit(1)
         
         # Check if log file exists
         if not Path(args.logfile).exists():
@@ -312,7 +504,8 @@ DATA FLOW:
                 include_filter=args.include,
                 exclude_filter=args.exclude,
                 keywords=args.keywords,
-                time_bucket=args.time_bucket
+                time_bucket=args.time_bucket,
+                merge_threshold=args.merge_similar
             )
             
             # Export results
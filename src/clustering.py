@@ -4,6 +4,7 @@ Groups similar error log lines together.
 """
 
 import re
+import heapq
 from collections import defaultdict, Counter
 
 
@@ -40,6 +41,66 @@ class ErrorClusterer:
         self.cluster_count = len(clusters)
         return clusters
     
+    def merge_similar_clusters(self, clusters, threshold=None):
+        """
+        Merge clusters whose signatures are similar.
+        
+        Works on the unique signatures rather than on individual lines.
+        Similarity is the Jaccard index of signature tokens and merges are
+        transitive (union-find). Candidate pairs come from an inverted
+        token index, but all signatures of one error type share that
+        token, so the cost is still quadratic in the number of clusters
+        per error type.
+        
+        Args:
+            clusters (dict): {signature: [(line_num, line), ...]}
+            threshold (float): Minimum similarity (defaults to similarity_threshold)
+            
+        Returns:
+            dict: {signature: [(line_num, line), ...]} keyed by the largest
+                  member of each merged group
+        """
+        if threshold is None:
+            threshold = self.similarity_threshold
+        
+        signatures = list(clusters)
+        token_sets = [frozenset(sig.replace('|', ' ').split()) for sig in signatures]
+        parent = list(range(len(signatures)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        index = defaultdict(list)
+        for i, tokens in enumerate(token_sets):
+            shared = Counter()
+            for token in tokens:
+                shared.update(index[token])
+                index[token].append(i)
+            
+            for j, common in shared.items():
+                union_size = len(tokens) + len(token_sets[j]) - common
+                if common / union_size >= threshold:
+                    parent[find(i)] = find(j)
+        
+        groups = defaultdict(list)
+        for i in range(len(signatures)):
+            groups[find(i)].append(signatures[i])
+        
+        merged = {}
+        for members in groups.values():
+            members.sort(key=lambda sig: len(clusters[sig]), reverse=True)
+            if len(members) == 1:
+                merged[members[0]] = clusters[members[0]]
+            else:
+                merged[members[0]] = sorted(
+                    entry for sig in members for entry in clusters[sig]
+                )
+        
+        return merged
+    
     def get_top_clusters(self, clusters, top_n=10):
         """
         Get the most frequent clusters.
@@ -51,15 +112,10 @@ class ErrorClusterer:
         Returns:
             list: [(signature, count, [(line_num, line), ...]), ...]
         """
-        cluster_items = [
-            (sig, len(lines), lines)
-            for sig, lines in clusters.items()
-        ]
-        
-        # Sort by frequency
-        cluster_items.sort(key=lambda x: x[1], reverse=True)
+        # Partial sort by frequency; stable, like a full sort then slice
+        top = heapq.nlargest(top_n, clusters.items(), key=lambda item: len(item[1]))
         
-        return cluster_items[:top_n]
+        return [(sig, len(lines), lines) for sig, lines in top]
     
     def get_cluster_stats(self, clusters):
         """
@@ -3,9 +3,10 @@ Diff Analyzer Module
 Compares two analysis runs to identify regressions and changes.
 """
 
-import json
 from datetime import datetime
 
+from . import json_utils
+
 
 class DiffAnalyzer:
     """Analyzes differences between two analysis runs."""
@@ -257,7 +258,7 @@ class DiffAnalyzer:
         """
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(diff, f, indent=2)
+                json_utils.dump(diff, f)
             return output_path
         except Exception as e:
             print(f"Error writing diff JSON: {e}")
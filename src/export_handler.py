@@ -4,14 +4,24 @@ Exports analysis results to CSV and HTML formats.
 """
 
 import csv
-import json
 from datetime import datetime
 from html import escape
 
+from . import json_utils
+
 
 class ExportHandler:
     """Handles exporting reports to various formats."""
     
+    CSV_FIELDS = [
+        'rank',
+        'signature',
+        'occurrence_count',
+        'sample_line',
+        'first_10_line_numbers',
+        'total_line_count',
+    ]
+    
     @staticmethod
     def export_csv(report, output_path):
         """
@@ -24,33 +34,18 @@ class ExportHandler:
         Returns:
             str: Path to created file
         """
-        rows = []
-        
         # Extract top clusters data
-        for rank, cluster in enumerate(report['top_clusters'], 1):
-            rows.append({
-                'rank': rank,
-                'signature': cluster['signature'],
-                'occurrence_count': cluster['count'],
-                'sample_line': cluster['sample_lines'][0] if cluster['sample_lines'] else '',
-                'first_10_line_numbers': ','.join(str(n) for n in cluster['line_numbers'][:10]),
-                'total_line_count': len(cluster['line_numbers']),
-            })
+        rows = [
+            ExportHandler._csv_row(rank, cluster)
+            for rank, cluster in enumerate(report['top_clusters'], 1)
+        ]
         
         if not rows:
             return None
         
         try:
             with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'rank',
-                    'signature',
-                    'occurrence_count',
-                    'sample_line',
-                    'first_10_line_numbers',
-                    'total_line_count',
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.DictWriter(csvfile, fieldnames=ExportHandler.CSV_FIELDS)
                 
                 writer.writeheader()
                 writer.writerows(rows)
@@ -60,6 +55,80 @@ class ExportHandler:
             print(f"Error writing CSV file: {e}")
             return None
     
+    @staticmethod
+    def _csv_row(rank, cluster):
+        """
+        Build the CSV row for one cluster.
+        
+        Args:
+            rank (int): 1-based rank of the cluster
+            cluster (dict): Cluster entry from report['top_clusters']
+            
+        Returns:
+            dict: Row keyed by CSV_FIELDS
+        """
+        return {
+            'rank': rank,
+            'signature': cluster['signature'],
+            'occurrence_count': cluster['count'],
+            'sample_line': cluster['sample_lines'][0] if cluster['sample_lines'] else '',
+            'first_10_line_numbers': ','.join(str(n) for n in cluster['line_numbers'][:10]),
+            'total_line_count': len(cluster['line_numbers']),
+        }
+    
+    @staticmethod
+    def export_all(report, csv_file, json_file, html_file, title="Error Log Analysis Report"):
+        """
+        Write the CSV, JSON and HTML reports in a single pass over the clusters.
+        
+        Each cluster row is written to the CSV and HTML files as it is
+        visited, so the HTML report is never built up as one string. A
+        failed write only stops the format it belongs to; the other files
+        are still written in full.
+        
+        Args:
+            report (dict): The report dictionary
+            csv_file: Open text file for the CSV (newline=''), or None to skip
+            json_file: Open text file for the JSON, or None to skip
+            html_file: Open text file for the HTML, or None to skip
+            title (str): HTML report title
+            
+        Returns:
+            dict: {format: exception} for each format that failed
+        """
+        files = {'csv': csv_file, 'json': json_file, 'html': html_file}
+        errors = {}
+        
+        def write(fmt, action, *args):
+            # Once a format has failed, skip the rest of its writes
+            if files[fmt] is None:
+                return
+            try:
+                action(*args)
+            except Exception as e:
+                errors[fmt] = e
+                files[fmt] = None
+        
+        if csv_file is not None:
+            csv_writer = csv.DictWriter(csv_file, fieldnames=ExportHandler.CSV_FIELDS)
+            write('csv', csv_writer.writeheader)
+        
+        if html_file is not None:
+            write('html', html_file.write, "\n".join(ExportHandler._html_head(report, title)))
+        
+        for rank, cluster in enumerate(report['top_clusters'], 1):
+            if files['csv'] is not None:
+                write('csv', csv_writer.writerow, ExportHandler._csv_row(rank, cluster))
+            if files['html'] is not None:
+                write('html', html_file.write, "\n" + ExportHandler._html_row(rank, cluster))
+        
+        if files['html'] is not None:
+            write('html', html_file.write, "\n" + "\n".join(ExportHandler._html_tail(report)))
+        
+        write('json', json_utils.dump, report, json_file)
+        
+        return errors
+    
     @staticmethod
     def export_json(report, output_path):
         """
@@ -74,7 +143,7 @@ class ExportHandler:
         """
         try:
             with open(output_path, 'w', encoding='utf-8') as jsonfile:
-                json.dump(report, jsonfile, indent=2)
+                json_utils.dump(report, jsonfile)
             return output_path
         except Exception as e:
             print(f"Error writing JSON file: {e}")
@@ -94,10 +163,11 @@ class ExportHandler:
             str: Path to created file
         """
         try:
-            html_content = ExportHandler._generate_html(report, title)
-            
+            # Stream the page row by row rather than building one big string
             with open(output_path, 'w', encoding='utf-8') as htmlfile:
-                htmlfile.write(html_content)
+                errors = ExportHandler.export_all(report, None, None, htmlfile, title=title)
+            if errors:
+                raise errors['html']
             
             return output_path
         except Exception as e:
@@ -105,19 +175,18 @@ class ExportHandler:
             return None
     
     @staticmethod
-    def _generate_html(report, title):
+    def _html_head(report, title):
         """
-        Generate HTML content from report.
+        Build the HTML parts that come before the cluster rows.
         
         Args:
             report (dict): The report dictionary
             title (str): Report title
             
         Returns:
-            str: HTML content
+            list: HTML parts, to be joined with newlines
         """
         summary = report['summary']
-        top_clusters = report['top_clusters']
         
         # Build HTML
         html_parts = []
@@ -369,17 +438,45 @@ class ExportHandler:
                 <tbody>
 """)
         
-        for rank, cluster in enumerate(top_clusters, 1):
-            sample = escape(cluster['sample_lines'][0][:100]) if cluster['sample_lines'] else 'N/A'
-            signature = escape(cluster['signature'][:80])
+        return html_parts
+    
+    @staticmethod
+    def _html_row(rank, cluster):
+        """
+        Build the top offenders table row for one cluster.
+        
+        Args:
+            rank (int): 1-based rank of the cluster
+            cluster (dict): Cluster entry from report['top_clusters']
             
-            html_parts.append(f"""                    <tr>
+        Returns:
+            str: HTML table row
+        """
+        sample = escape(cluster['sample_lines'][0][:100]) if cluster['sample_lines'] else 'N/A'
+        signature = escape(cluster['signature'][:80])
+        
+        return f"""                    <tr>
                         <td class="rank">#{rank}</td>
                         <td class="signature" title="{escape(cluster['signature'])}">{signature}</td>
                         <td><span class="occurrence">{cluster['count']}</span></td>
                         <td><div class="sample-line">{sample}...</div></td>
                     </tr>
-""")
+"""
+    
+    @staticmethod
+    def _html_tail(report):
+        """
+        Build the HTML parts that come after the cluster rows.
+        
+        Args:
+            report (dict): The report dictionary
+            
+        Returns:
+            list: HTML parts, to be joined with newlines
+        """
+        summary = report['summary']
+        top_clusters = report['top_clusters']
+        html_parts = []
         
         html_parts.append("""                </tbody>
             </table>
@@ -425,7 +522,7 @@ class ExportHandler:
 </html>
 """)
         
-        return "\n".join(html_parts)
+        return html_parts
 
 
 
@@ -0,0 +1,53 @@
+"""
+JSON Utilities Module
+Reads and writes report JSON, using orjson when it is installed.
+"""
+
+import json
+import re
+
+try:
+    import orjson  # Optional: much faster C/Rust JSON parser and serializer
+except ImportError:
+    orjson = None
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def load(fp):
+    """
+    Parse JSON from an open file.
+    
+    Args:
+        fp: File opened in binary (preferred) or text mode
+        
+    Returns:
+        The parsed object
+    """
+    if orjson is not None:
+        # orjson has no load(); it parses the whole buffer in one call
+        data = fp.read()
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Older reports may hold Infinity/NaN, which only json accepts
+            return json.loads(data)
+    return json.load(fp)
+
+
+def dump(obj, fp):
+    """
+    Write an object as JSON indented by two spaces.
+    
+    Args:
+        obj: The object to serialize
+        fp: File opened in text mode
+    """
+    if orjson is not None:
+        text = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        if not text.isascii():
+            # Escape like json's default ensure_ascii so both backends agree
+            text = _NON_ASCII.sub(lambda m: json.dumps(m.group(0))[1:-1], text)
+        fp.write(text)
+    else:
+        json.dump(obj, fp, indent=2)
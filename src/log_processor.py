@@ -3,29 +3,46 @@ Log Processor Module
 Reads and processes large error log files with memory bounds.
 """
 
+import io
+import os
 import re
+import mmap
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import re2  # Optional: DFA-based engine, no catastrophic backtracking
+except ImportError:
+    re2 = None
+
+# Character classes that re matches as Unicode but RE2 only as ASCII
+_UNICODE_CLASSES = re.compile(r'(?<!\\)(?:\\\\)*\\[wWdDsSbB]')
 
 
 class LogProcessor:
     """Processes error logs with memory-conscious streaming."""
     
-    def __init__(self, chunk_size=1000):
+    def __init__(self, chunk_size=1000, read_buffer=2 * 1024 * 1024, read_depth=8):
         """
         Initialize the log processor.
         
         Args:
-            chunk_size (int): Number of lines to process before gc cleanup
+            chunk_size (int): Number of lines per processing chunk
+            read_buffer (int): Bytes per read from the log file (default 2 MiB)
+            read_depth (int): Block reads kept in flight ahead of parsing
         """
         self.chunk_size = chunk_size
+        self.read_buffer = read_buffer
+        self.read_depth = read_depth
         self.time_pattern = re.compile(
             r'(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})'
             r'[\s_]'
             r'(\d{1,2}:\d{2}:\d{2}(?:\.\d{3})?(?::\d{2})?)'
         )
     
-    def read_logs(self, filepath, encoding='utf-8', max_lines=None):
+    def read_logs(self, filepath, encoding='utf-8', max_lines=None,
+                  start_offset=0, end_offset=None, first_line_num=0):
         """
         Read logs from a file with memory efficiency.
         
@@ -33,25 +50,173 @@ class LogProcessor:
             filepath (str): Path to the log file
             encoding (str): File encoding
             max_lines (int): Maximum number of lines to read (None for all)
+            start_offset (int): Byte offset to start at (must begin a line)
+            end_offset (int): Byte offset to stop at (None for end of file)
+            first_line_num (int): Line number of the first line read
             
         Yields:
             tuple: (line_number, line_content, timestamp)
         """
-        line_num = 0
+        line_num = first_line_num
         try:
-            with open(filepath, 'r', encoding=encoding, errors='ignore') as f:
-                for raw_line in f:
-                    if max_lines and line_num >= max_lines:
-                        break
-                    
-                    line = raw_line.rstrip('\n\r')
-                    if line.strip():  # Skip empty lines
-                        timestamp = self._extract_timestamp(line)
-                        yield line_num, line, timestamp
-                        line_num += 1
+            for line in self._iter_lines(filepath, encoding, start_offset, end_offset):
+                if max_lines and line_num - first_line_num >= max_lines:
+                    break
+                
+                if line.strip():  # Skip empty lines
+                    timestamp = self._extract_timestamp(line)
+                    yield line_num, line, timestamp
+                    line_num += 1
         except Exception as e:
             print(f"Error reading file {filepath}: {e}")
     
+    def _iter_lines(self, filepath, encoding, start_offset=0, end_offset=None):
+        """
+        Yield decoded lines without their line endings.
+        
+        Uses the concurrent block reader when the encoding keeps newlines
+        as a single b'\\n' byte (UTF-8, ASCII, Latin-1, ...), otherwise
+        falls back to a plain text-mode read. Both paths split lines on
+        '\\n', '\\r\\n' and a bare '\\r', like universal newlines.
+        
+        Args:
+            filepath (str): Path to the log file
+            encoding (str): File encoding
+            start_offset (int): Byte offset to start at
+            end_offset (int): Byte offset to stop at (None for end of file)
+            
+        Yields:
+            str: Each line of the file
+        """
+        if not hasattr(os, 'pread') or '\n'.encode(encoding) != b'\n':
+            if not start_offset and end_offset is None:
+                with open(filepath, 'r', encoding=encoding, errors='ignore',
+                          buffering=self.read_buffer) as f:
+                    self._advise_sequential(f.fileno())
+                    for raw_line in f:
+                        yield raw_line.rstrip('\n\r')
+                return
+            
+            with open(filepath, 'rb') as f:
+                f.seek(start_offset)
+                size = -1 if end_offset is None else end_offset - start_offset
+                text = io.StringIO(f.read(size).decode(encoding, 'ignore'), newline=None)
+            for raw_line in text:
+                yield raw_line.rstrip('\n\r')
+            return
+        
+        tail = b''
+        split_crlf = False
+        for block in self.read_chunks(filepath, start_offset, end_offset):
+            if split_crlf and block.startswith(b'\n'):
+                block = block[1:]  # Rest of a '\r\n' cut by the block boundary
+            split_crlf = block.endswith(b'\r')
+            # bytes.splitlines breaks on exactly '\n', '\r\n' and '\r'
+            raw_lines = block.splitlines()
+            if not raw_lines:
+                continue
+            # Carry the partial last line over to the next block
+            raw_lines[0] = tail + raw_lines[0]
+            tail = b'' if block.endswith((b'\n', b'\r')) else raw_lines.pop()
+            for raw_line in raw_lines:
+                yield raw_line.decode(encoding, 'ignore')
+        if tail:
+            yield tail.decode(encoding, 'ignore')
+    
+    def read_chunks(self, filepath, start_offset=0, end_offset=None):
+        """
+        Read a file as raw blocks, keeping several reads in flight.
+        
+        Up to `read_depth` positional reads of `read_buffer` bytes are
+        queued on a thread pool; os.pread releases the GIL, so disk I/O
+        overlaps with parsing of the blocks already returned.
+        
+        Args:
+            filepath (str): Path to the log file
+            start_offset (int): Byte offset to start at
+            end_offset (int): Byte offset to stop at (None for end of file)
+            
+        Yields:
+            bytes: Consecutive blocks of the file, in order
+        """
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if end_offset is not None:
+                size = min(size, end_offset)
+            self._advise_sequential(fd, start_offset, size - start_offset)
+            offsets = iter(range(start_offset, size, self.read_buffer))
+            depth = max(1, self.read_depth)
+            
+            with ThreadPoolExecutor(max_workers=depth) as pool:
+                pending = deque()
+                for offset in offsets:
+                    pending.append(pool.submit(os.pread, fd, min(self.read_buffer, size - offset), offset))
+                    if len(pending) >= depth:
+                        break
+                
+                while pending:
+                    block = pending.popleft().result()
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        pending.append(pool.submit(os.pread, fd, min(self.read_buffer, size - offset), offset))
+                    yield block
+        finally:
+            os.close(fd)
+    
+    def split_ranges(self, filepath, parts, start_offset=0, end_offset=None):
+        """
+        Split a file into byte ranges that each start at a line boundary.
+        
+        Args:
+            filepath (str): Path to the log file
+            parts (int): Number of ranges wanted
+            start_offset (int): Byte offset of the first range
+            end_offset (int): Byte offset where the last range ends (None for EOF)
+            
+        Returns:
+            list: [(start, end), ...] covering the requested span, in order
+        """
+        with open(filepath, 'rb') as f:
+            size = f.seek(0, 2)
+            if end_offset is not None:
+                size = min(size, end_offset)
+            if size <= start_offset:
+                return []
+            
+            step = max(1, (size - start_offset) // max(1, parts))
+            boundaries = [start_offset]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for i in range(1, parts):
+                    target = max(start_offset + i * step, boundaries[-1])
+                    newline = mm.find(b'\n', target, size)
+                    if newline == -1:
+                        break
+                    if newline + 1 < size and newline + 1 > boundaries[-1]:
+                        boundaries.append(newline + 1)
+        
+        boundaries.append(size)
+        return list(zip(boundaries, boundaries[1:]))
+    
+    @staticmethod
+    def _advise_sequential(fd, offset=0, length=0):
+        """
+        Tell the kernel a file range will be read sequentially.
+        
+        This widens the readahead window for the scan. It is only a hint
+        and does nothing where posix_fadvise is unavailable.
+        
+        Args:
+            fd (int): Open file descriptor
+            offset (int): Start of the range
+            length (int): Length of the range (0 for the rest of the file)
+        """
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, offset, max(0, length), os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+    
     def _extract_timestamp(self, line):
         """
         Extract timestamp from a log line.
@@ -65,36 +230,67 @@ class LogProcessor:
         match = self.time_pattern.search(line)
         return match.group(0) if match else None
     
+    @staticmethod
+    def compile_pattern(pattern):
+        """
+        Compile a filter pattern, passing already compiled patterns through.
+        
+        Uses RE2 when the optional `re2` module is installed and supports
+        the pattern; otherwise falls back to the standard `re` module.
+        Patterns using \\w, \\d, \\s, \\b (or their negations) always use
+        `re`: RE2 matches those as ASCII only, so e.g. caf\\w would miss
+        "café" and filter differently depending on what is installed.
+        
+        Args:
+            pattern (str or re.Pattern): The regex pattern
+            
+        Returns:
+            Case-insensitive compiled pattern with a `search` method
+        """
+        if not isinstance(pattern, str):
+            return pattern
+        if re2 is not None and not _UNICODE_CLASSES.search(pattern):
+            try:
+                return re2.compile('(?i)' + pattern)
+            except Exception:
+                pass  # e.g. backreferences or lookarounds, which RE2 rejects
+        return re.compile(pattern, re.IGNORECASE)
+    
     def filter_logs(self, logs, pattern=None, exclude_pattern=None, error_keywords=None):
         """
         Filter logs based on patterns and keywords.
         
         Args:
             logs (iterable): Iterator of (line_num, line, timestamp) tuples
-            pattern (str): Regex pattern to match (inclusive)
-            exclude_pattern (str): Regex pattern to exclude
-            error_keywords (list): Keywords that must appear in the line
+            pattern (str or re.Pattern): Regex pattern to match (inclusive)
+            exclude_pattern (str or re.Pattern): Regex pattern to exclude
+            error_keywords (iterable): Keywords that must appear in the line;
+                a frozenset is used as is and must already be lowercase
             
         Yields:
             tuple: Filtered (line_num, line, timestamp)
         """
-        include_re = re.compile(pattern, re.IGNORECASE) if pattern else None
-        exclude_re = re.compile(exclude_pattern, re.IGNORECASE) if exclude_pattern else None
-        keywords = set(kw.lower() for kw in error_keywords) if error_keywords else set()
+        include_search = self.compile_pattern(pattern).search if pattern else None
+        exclude_search = self.compile_pattern(exclude_pattern).search if exclude_pattern else None
+        if isinstance(error_keywords, frozenset):
+            keywords = error_keywords  # Prepared once by the caller
+        else:
+            keywords = frozenset(kw.lower() for kw in error_keywords) if error_keywords else frozenset()
         
         for line_num, line, timestamp in logs:
             # Check exclusion pattern
-            if exclude_re and exclude_re.search(line):
+            if exclude_search and exclude_search(line):
                 continue
             
             # Check inclusion pattern
-            if include_re and not include_re.search(line):
+            if include_search and not include_search(line):
                 continue
             
             # Check keywords
-            line_lower = line.lower()
-            if keywords and not any(kw in line_lower for kw in keywords):
-                continue
+            if keywords:
+                line_lower = line.lower()
+                if not any(kw in line_lower for kw in keywords):
+                    continue
             
             yield line_num, line, timestamp
     
@@ -157,13 +353,33 @@ class LogProcessor:
         Returns:
             dict: Statistics dictionary
         """
-        stats = {
+        stats = {}
+        for _ in self.track_stats(logs, stats):
+            pass
+        return stats
+    
+    def track_stats(self, logs, stats):
+        """
+        Pass logs through unchanged while accumulating statistics.
+        
+        Lets a single streaming read feed both the statistics and the
+        downstream pipeline. The stats dict is complete once the iterator
+        is exhausted.
+        
+        Args:
+            logs (iterable): Iterator of (line_num, line, timestamp) tuples
+            stats (dict): Dictionary to fill with statistics
+            
+        Yields:
+            tuple: (line_num, line, timestamp)
+        """
+        stats.update({
             'total_lines': 0,
             'with_timestamp': 0,
             'avg_line_length': 0,
             'min_line_length': float('inf'),
             'max_line_length': 0,
-        }
+        })
         
         total_length = 0
         for line_num, line, timestamp in logs:
@@ -175,13 +391,44 @@ class LogProcessor:
             total_length += line_len
             stats['min_line_length'] = min(stats['min_line_length'], line_len)
             stats['max_line_length'] = max(stats['max_line_length'], line_len)
+            
+            yield line_num, line, timestamp
         
         if stats['total_lines'] > 0:
             stats['avg_line_length'] = total_length / stats['total_lines']
-            if stats['min_line_length'] == float('inf'):
-                stats['min_line_length'] = 0
+        else:
+            # No lines: report 0 rather than inf, which is not valid JSON
+            stats['min_line_length'] = 0
+    
+    @staticmethod
+    def merge_stats(stats, other):
+        """
+        Combine statistics of two consecutive parts of a log.
         
-        return stats
+        Args:
+            stats (dict): Statistics of the first part
+            other (dict): Statistics of the second part
+            
+        Returns:
+            dict: Statistics covering both parts
+        """
+        if not other.get('total_lines'):
+            return dict(stats)
+        if not stats.get('total_lines'):
+            return dict(other)
+        
+        total_lines = stats['total_lines'] + other['total_lines']
+        # Line lengths are integers: round each part's total back to exact
+        # so the merged average equals a single pass over both parts
+        total_length = (round(stats['avg_line_length'] * stats['total_lines']) +
+                        round(other['avg_line_length'] * other['total_lines']))
+        return {
+            'total_lines': total_lines,
+            'with_timestamp': stats['with_timestamp'] + other['with_timestamp'],
+            'avg_line_length': total_length / total_lines,
+            'min_line_length': min(stats['min_line_length'], other['min_line_length']),
+            'max_line_length': max(stats['max_line_length'], other['max_line_length']),
+        }
 
 
 
@@ -3,6 +3,7 @@ Report Generator Module
 Generates analysis reports from clustered logs.
 """
 
+import heapq
 from collections import Counter
 
 
@@ -53,18 +54,19 @@ class ReportGenerator:
         Returns:
             list: Top clusters with details
         """
-        cluster_list = []
-        for signature, lines in clusters.items():
-            cluster_list.append({
+        # Pick the top N by count first (heapq.nlargest is a stable partial
+        # sort, like Counter.most_common), then build details only for them
+        top = heapq.nlargest(top_n, clusters.items(), key=lambda item: len(item[1]))
+        
+        return [
+            {
                 'signature': signature,
                 'count': len(lines),
                 'sample_lines': [line for _, line in lines[:3]],
                 'line_numbers': [line_num for line_num, _ in lines],
-            })
-        
-        # Sort by count descending
-        cluster_list.sort(key=lambda x: x['count'], reverse=True)
-        return cluster_list[:top_n]
+            }
+            for signature, lines in top
+        ]
     
     def _get_cluster_statistics(self, clusters):
         """
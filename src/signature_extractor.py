@@ -4,31 +4,71 @@ Normalizes error log lines and extracts error signatures.
 """
 
 import re
+import sys
 from collections import Counter
 
 
 class SignatureExtractor:
     """Extracts and normalizes error signatures from log lines."""
     
-    def __init__(self):
-        """Initialize the signature extractor with common patterns."""
-        # Patterns to normalize (find and replace with placeholders)
+    def __init__(self, cache_size=65536):
+        """
+        Initialize the signature extractor with common patterns.
+        
+        Args:
+            cache_size (int): Distinct lines whose signatures are remembered
+        """
+        # Error logs repeat the same lines many times; remember their
+        # signatures instead of re-running every substitution
+        self.cache_size = cache_size
+        self._cache = {}
+        
+        # Patterns to normalize (find and replace with placeholders).
+        # None of them match across a newline, so they can also be applied
+        # to many lines joined with '\n' in one pass (see get_signatures_bulk).
+        # Letters are spelled out in both cases instead of using IGNORECASE,
+        # which keeps the regex engine on its fast literal/charset paths.
         self.patterns = [
             (r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b', '<IP>'),  # IP addresses
-            (r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', '<UUID>'),  # UUIDs
+            (r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b', '<UUID>'),  # UUIDs
             (r'\b\d{10,}\b', '<NUM>'),  # Large numbers (timestamps, IDs)
-            (r'(at |in )\d+', r'\1<LINE>'),  # Line numbers
-            (r'0x[0-9a-f]+', '<HEX>'),  # Hex addresses
-            (r'"[^"]*"', '<STR>'),  # Quoted strings
-            (r"'[^']*'", '<STR>'),  # Single quoted strings
+            (r'([aA][tT] |[iI][nN] )\d+', r'\1<LINE>'),  # Line numbers
+            (r'0[xX][0-9a-fA-F]+', '<HEX>'),  # Hex addresses
+            (r'"[^"\n]*"', '<STR>'),  # Quoted strings
+            (r"'[^'\n]*'", '<STR>'),  # Single quoted strings
             (r'/[\w/.-]+', '<PATH>'),  # File paths (unix)
             (r'\\[\w\\.-]+', '<PATH>'),  # File paths (windows)
             (r'\b\d+\.\d+\.\d+\.\d+\b', '<VERSION>'),  # Versions
         ]
         
         # Compile patterns for performance
-        self.compiled_patterns = [(re.compile(pattern, re.IGNORECASE), repl) 
+        self.compiled_patterns = [(re.compile(pattern), repl) 
                                   for pattern, repl in self.patterns]
+        
+        # Remove specific port numbers but keep the structure
+        self.port_pattern = re.compile(r':\d{4,5}(?=\s|$)')
+        # Runs of whitespace within a line
+        self.space_pattern = re.compile(r'[^\S\n]+')
+        
+        # Noise removed from normalized lines before building signatures
+        self.noise_patterns = [
+            # [YYYY-MM-DD HH:MM:SS.mmm] and similar patterns
+            re.compile(r'\[\d{4}-\d{2}-\d{2}[^\S\n]+\d{2}:\d{2}:\d{2}\.?\d*\]'),
+            # Loose timestamps
+            re.compile(r'\d{1,2}:\d{2}:\d{2}\.?\d*\]?'),
+            # Error/warn/critical labels that might be duplicated
+            # (the text is already lowercased by normalization)
+            re.compile(r'(error|warn|critical|info|debug):[^\S\n]*'),
+        ]
+        
+        # Each error pattern is paired with a substring the lowercased line
+        # must contain for it to match, so most searches can be skipped
+        self.error_patterns = [
+            (':', re.compile(r'\b(Error|Exception|Warning|Critical|Fatal):\s*(\w+)', re.IGNORECASE)),
+            ('error', re.compile(r'\b(\w+Error)\b', re.IGNORECASE)),
+            ('exception', re.compile(r'\b(\w+Exception)\b', re.IGNORECASE)),
+            ('', re.compile(r'(?:at|in|from)\s+(\w+)', re.IGNORECASE)),
+        ]
     
     def normalize(self, line):
         """
@@ -40,20 +80,28 @@ class SignatureExtractor:
         Returns:
             str: The normalized log line
         """
-        normalized = line.strip()
+        return self._normalize_text(line.strip())
+    
+    def _normalize_text(self, text):
+        """
+        Apply the normalization substitutions to already stripped text.
         
-        # Apply all patterns
+        Args:
+            text (str): One line, or several lines joined with '\\n'
+            
+        Returns:
+            str: The normalized text
+        """
         for pattern, replacement in self.compiled_patterns:
-            normalized = pattern.sub(replacement, normalized)
+            text = pattern.sub(replacement, text)
         
         # Additional aggressive normalization for better clustering
-        # Remove specific port numbers but keep the structure
-        normalized = re.sub(r':\d{4,5}(?=\s|$)', ':<PORT>', normalized)
+        text = self.port_pattern.sub(':<PORT>', text)
         
         # Reduce multiple spaces
-        normalized = re.sub(r'\s+', ' ', normalized)
+        text = self.space_pattern.sub(' ', text)
         
-        return normalized.lower()
+        return text.lower()
     
     def extract_error_type(self, line):
         """
@@ -66,15 +114,11 @@ class SignatureExtractor:
             str: The error type (Exception name, Error class, or first significant word)
         """
         # Look for common error patterns
-        error_patterns = [
-            r'\b(Error|Exception|Warning|Critical|Fatal):\s*(\w+)',
-            r'\b(\w+Error)\b',
-            r'\b(\w+Exception)\b',
-            r'(?:at|in|from)\s+(\w+)',
-        ]
-        
-        for pattern in error_patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
+        line_lower = line.lower()
+        for required, pattern in self.error_patterns:
+            if required not in line_lower:
+                continue
+            match = pattern.search(line)
             if match:
                 return match.group(1) if len(match.groups()) == 1 else match.group(2)
         
@@ -97,24 +141,96 @@ class SignatureExtractor:
         Returns:
             str: A compact signature
         """
-        error_type = self.extract_error_type(line)
-        normalized = self.normalize(line)
+        signature = self._cache.get(line)
+        if signature is None:
+            error_type = self.extract_error_type(line)
+            normalized = self._remove_noise(self.normalize(line))
+            signature = self._build_signature(error_type, normalized)
+            self._remember({line: signature})
+        return signature
+    
+    def get_signatures_bulk(self, lines):
+        """
+        Get signatures for many lines at once.
         
-        # Remove timestamps - be more aggressive
-        # Removes [YYYY-MM-DD HH:MM:SS.mmm] and similar patterns
-        normalized = re.sub(r'\[\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\.?\d*\]', '', normalized)
-        # Also remove loose timestamps
-        normalized = re.sub(r'\d{1,2}:\d{2}:\d{2}\.?\d*\]?', '', normalized)
-        # Remove error/warn/critical labels that might be duplicated
-        normalized = re.sub(r'(error|warn|critical|info|debug):\s*', '', normalized, flags=re.IGNORECASE)
+        The lines are joined with '\\n' so every normalization pattern runs
+        once over the whole batch instead of once per line. Produces the
+        same result as calling get_signature on each line.
         
+        Lines seen before (in this batch or, up to cache_size, earlier ones)
+        are only processed once.
+        
+        Args:
+            lines (iterable): Log lines without line endings
+            
+        Returns:
+            list: Signatures, in the same order as the lines
+        """
+        lines = list(lines)
+        cache = self._cache
+        missing = list(dict.fromkeys(line for line in lines if line not in cache))
+        if not missing:
+            return [cache[line] for line in lines]
+        if any('\n' in line for line in missing):
+            return [self.get_signature(line) for line in lines]
+        
+        joined = '\n'.join(line.strip() for line in missing)
+        normalized_lines = self._remove_noise(self._normalize_text(joined)).split('\n')
+        computed = {
+            line: self._build_signature(self.extract_error_type(line), normalized)
+            for line, normalized in zip(missing, normalized_lines)
+        }
+        
+        signatures = [computed.get(line) or cache[line] for line in lines]
+        self._remember(computed)
+        return signatures
+    
+    def _remember(self, signatures):
+        """
+        Add {line: signature} entries to the cache, starting over when full.
+        
+        Args:
+            signatures (dict): Newly computed signatures
+        """
+        if len(self._cache) + len(signatures) > self.cache_size:
+            self._cache.clear()
+            if len(signatures) > self.cache_size:
+                return
+        self._cache.update(signatures)
+    
+    def _remove_noise(self, normalized):
+        """
+        Remove timestamps and level labels from normalized text.
+        
+        Args:
+            normalized (str): Normalized text
+            
+        Returns:
+            str: Text without the noise
+        """
+        for pattern in self.noise_patterns:
+            normalized = pattern.sub('', normalized)
+        return normalized
+    
+    def _build_signature(self, error_type, normalized):
+        """
+        Combine error type with the first meaningful normalized tokens.
+        
+        Args:
+            error_type (str): Extracted error type
+            normalized (str): Normalized line without noise
+            
+        Returns:
+            str: A compact signature
+        """
         # Get meaningful tokens
         tokens = normalized.split()
         # Filter out very short tokens and duplicates
         tokens = [t for t in tokens if len(t) > 2][:4]
         
         signature = f"{error_type}|" + " ".join(tokens)
-        return signature[:90]  # Limit signature length
+        # Interned so every line with this signature shares one string
+        return sys.intern(signature[:90])  # Limit signature length
 
 
 
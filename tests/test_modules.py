@@ -3,14 +3,21 @@ Unit tests for Error Log Classifier modules
 """
 
 import unittest
+from unittest import mock
+import io
 import tempfile
 import json
+import re
+import contextlib
 from pathlib import Path
 
 from src.signature_extractor import SignatureExtractor
 from src.clustering import ErrorClusterer
 from src.log_processor import LogProcessor
 from src.report_generator import ReportGenerator
+from src.export_handler import ExportHandler
+from src import json_utils
+import watcher
 
 
 class TestSignatureExtractor(unittest.TestCase):
@@ -44,6 +51,39 @@ class TestSignatureExtractor(unittest.TestCase):
         sig = self.extractor.get_signature(line)
         self.assertIsInstance(sig, str)
         self.assertGreater(len(sig), 0)
+    
+    def test_get_signatures_bulk(self):
+        """Test bulk extraction matches per-line extraction."""
+        lines = [
+            "[2024-12-01 10:15:23.456] ERROR: Database timeout at server 192.168.1.100:5432",
+            "WARN: 'unterminated quote",
+            "  ERROR:   NullPointerException in UserService.getUser(\"abc\")  ",
+            "",
+        ]
+        expected = [self.extractor.get_signature(line) for line in lines]
+        
+        self.assertEqual(self.extractor.get_signatures_bulk(lines), expected)
+        self.assertEqual(self.extractor.get_signatures_bulk([]), [])
+    
+    def test_signature_cache(self):
+        """Test repeated lines are served from the bounded cache."""
+        extractor = SignatureExtractor(cache_size=2)
+        lines = ["ERROR: Disk full on /dev/sda1", "ERROR: Disk full on /dev/sda1", "WARN: Slow query"]
+        expected = [self.extractor.get_signature(line) for line in lines]
+        
+        self.assertEqual(extractor.get_signatures_bulk(lines), expected)
+        self.assertEqual(len(extractor._cache), 2)
+        self.assertEqual(extractor.get_signature("INFO: Started"), self.extractor.get_signature("INFO: Started"))
+        self.assertLessEqual(len(extractor._cache), 2)
+    
+    def test_signatures_are_interned(self):
+        """Test lines with the same signature share one string object."""
+        sigs = self.extractor.get_signatures_bulk([
+            "Connection to 10.0.0.1 refused",
+            "Connection to 10.0.0.2 refused",
+        ])
+        
+        self.assertIs(sigs[0], sigs[1])
 
 
 class TestClustering(unittest.TestCase):
@@ -65,6 +105,21 @@ class TestClustering(unittest.TestCase):
         self.assertEqual(len(clusters["sig1"]), 2)
         self.assertEqual(len(clusters["sig2"]), 1)
     
+    def test_merge_similar_clusters(self):
+        """Test merging clusters with similar signatures."""
+        clusters = {
+            "timeout|database connection timeout server": [(0, "line1"), (2, "line3")],
+            "timeout|database connection timeout host": [(1, "line2")],
+            "npe|nullpointerexception userservice": [(3, "line4")],
+        }
+        merged = self.clusterer.merge_similar_clusters(clusters, threshold=0.6)
+        
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(
+            merged["timeout|database connection timeout server"],
+            [(0, "line1"), (1, "line2"), (2, "line3")],
+        )
+    
     def test_get_top_clusters(self):
         """Test getting top clusters."""
         clusters = {
@@ -109,6 +164,19 @@ class TestReportGenerator(unittest.TestCase):
         self.assertEqual(report['summary']['total_clusters'], 2)
         self.assertEqual(report['summary']['total_lines'], 3)
     
+    def test_top_clusters_order(self):
+        """Test top clusters are ranked by count, ties in first-seen order."""
+        clusters = {
+            "a": [(0, "l0")],
+            "b": [(1, "l1"), (2, "l2")],
+            "c": [(3, "l3")],
+            "d": [(4, "l4"), (5, "l5")],
+        }
+        top = self.report_gen.generate_summary(clusters)['top_clusters']
+        
+        self.assertEqual([c['signature'] for c in top], ["b", "d", "a", "c"])
+        self.assertEqual(top[0]['line_numbers'], [1, 2])
+    
     def test_format_summary_text(self):
         """Test text formatting."""
         clusters = {
@@ -121,6 +189,62 @@ class TestReportGenerator(unittest.TestCase):
         self.assertIn('SUMMARY', text)
 
 
+class TestExportHandler(unittest.TestCase):
+    """Test report export."""
+    
+    def test_export_all(self):
+        """Test single-pass export matches the per-format output."""
+        clusters = {
+            "sig1": [(0, "line1"), (1, "line2")],
+            "sig2": [(3, "line4")],
+        }
+        report = ReportGenerator().generate_summary(clusters)
+        csv_file, json_file, html_file = io.StringIO(), io.StringIO(), io.StringIO()
+        ExportHandler.export_all(report, csv_file, json_file, html_file)
+        
+        self.assertEqual(json.loads(json_file.getvalue()), json.loads(json.dumps(report)))
+        self.assertEqual(len(csv_file.getvalue().splitlines()), 3)
+        self.assertIn("sig2", html_file.getvalue())
+        self.assertEqual(html_file.getvalue().count("<tr>"), 3)
+    
+    def test_export_all_isolates_failures(self):
+        """Test a failing file does not stop the other formats."""
+        class FullDisk(io.StringIO):
+            def write(self, text):
+                raise OSError(28, 'No space left on device')
+        
+        report = ReportGenerator().generate_summary({"sig1": [(0, "line1")]})
+        csv_file, json_file = io.StringIO(), io.StringIO()
+        errors = ExportHandler.export_all(report, csv_file, json_file, FullDisk())
+        
+        self.assertEqual(list(errors), ['html'])
+        self.assertEqual(len(csv_file.getvalue().splitlines()), 2)
+        self.assertEqual(json.loads(json_file.getvalue()), json.loads(json.dumps(report)))
+    
+    def test_json_round_trip(self):
+        """Test report JSON written by json_utils loads back unchanged."""
+        report = {'summary': {'total_lines': 3, 'average_cluster_size': 1.5}, 'top_clusters': []}
+        out = io.StringIO()
+        json_utils.dump(report, out)
+        
+        self.assertIn('\n  "summary"', out.getvalue())
+        self.assertEqual(json_utils.load(io.BytesIO(out.getvalue().encode('utf-8'))), report)
+    
+    def test_json_load_infinity(self):
+        """Test reports written with Infinity by older versions still load."""
+        data = b'{"statistics": {"min_line_length": Infinity}, "top_clusters": []}'
+        
+        self.assertEqual(json_utils.load(io.BytesIO(data))['statistics']['min_line_length'], float('inf'))
+    
+    def test_json_non_ascii(self):
+        """Test non-ASCII text is escaped the same way as json.dump."""
+        report = {'signature': 'caf\u00e9 \U0001f600'}
+        out = io.StringIO()
+        json_utils.dump(report, out)
+        
+        self.assertEqual(out.getvalue(), json.dumps(report, indent=2))
+
+
 class TestLogProcessor(unittest.TestCase):
     """Test log processing functionality."""
     
@@ -152,6 +276,62 @@ class TestLogProcessor(unittest.TestCase):
         self.assertEqual(logs[0][0], 0)  # line number
         self.assertIn("Test error 1", logs[0][1])  # line content
     
+    def test_read_logs_small_blocks(self):
+        """Test lines split across read blocks are stitched back together."""
+        processor = LogProcessor(read_buffer=7, read_depth=3)
+        
+        self.assertEqual(list(processor.read_logs(self.temp_path)),
+                         list(self.processor.read_logs(self.temp_path)))
+        self.assertEqual(b''.join(processor.read_chunks(self.temp_path)),
+                         Path(self.temp_path).read_bytes())
+    
+    def test_read_logs_carriage_returns(self):
+        """Test bare '\\r' and '\\r\\n' end lines, even across read blocks."""
+        Path(self.temp_path).write_bytes(b'ERROR: a 1\rERROR: b 2\r\nWARN: c\r\n')
+        
+        for processor in (self.processor, LogProcessor(read_buffer=1, read_depth=2)):
+            lines = [line for _, line, _ in processor.read_logs(self.temp_path)]
+            self.assertEqual(lines, ['ERROR: a 1', 'ERROR: b 2', 'WARN: c'])
+    
+    def test_read_logs_byte_range(self):
+        """Test reading only the lines appended after a byte offset."""
+        full = list(self.processor.read_logs(self.temp_path))
+        offset = len(full[0][1]) + 1
+        tail = list(self.processor.read_logs(self.temp_path, start_offset=offset, first_line_num=1))
+        
+        self.assertEqual(tail, full[1:])
+    
+    def test_merge_stats(self):
+        """Test combining statistics of two parts of a log."""
+        full = self.processor.get_stats(self.processor.read_logs(self.temp_path))
+        logs = list(self.processor.read_logs(self.temp_path))
+        merged = self.processor.merge_stats(
+            self.processor.get_stats(logs[:1]),
+            self.processor.get_stats(logs[1:])
+        )
+        
+        self.assertEqual(merged['total_lines'], full['total_lines'])
+        self.assertEqual(merged['max_line_length'], full['max_line_length'])
+        self.assertEqual(merged['avg_line_length'], full['avg_line_length'])
+        
+        # Lengths 22093 + 7098 over 152 + 47 lines drift if merged as floats
+        part = {'with_timestamp': 0, 'min_line_length': 1, 'max_line_length': 300}
+        merged = self.processor.merge_stats(
+            dict(part, total_lines=152, avg_line_length=22093 / 152),
+            dict(part, total_lines=47, avg_line_length=7098 / 47)
+        )
+        self.assertEqual(merged['avg_line_length'], (22093 + 7098) / 199)
+    
+    def test_split_ranges(self):
+        """Test byte ranges cover the file and start on line boundaries."""
+        data = Path(self.temp_path).read_bytes()
+        ranges = self.processor.split_ranges(self.temp_path, 3)
+        
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(b''.join(data[start:end] for start, end in ranges), data)
+        for start, _ in ranges[1:]:
+            self.assertEqual(data[start - 1:start], b'\n')
+    
     def test_filter_logs_by_pattern(self):
         """Test filtering logs by pattern."""
         logs = self.processor.read_logs(self.temp_path)
@@ -165,6 +345,101 @@ class TestLogProcessor(unittest.TestCase):
         filtered = list(self.processor.filter_logs(logs, exclude_pattern='WARN'))
         
         self.assertEqual(len(filtered), 2)
+    
+    def test_filter_logs_keywords(self):
+        """Test keyword lists are matched case-insensitively."""
+        logs = self.processor.read_logs(self.temp_path)
+        filtered = list(self.processor.filter_logs(logs, error_keywords=['Error 2', 'WARNING']))
+        
+        self.assertEqual(len(filtered), 2)
+    
+    def test_filter_logs_compiled_pattern(self):
+        """Test filtering with a precompiled pattern and keywords."""
+        logs = self.processor.read_logs(self.temp_path)
+        pattern = self.processor.compile_pattern('error')
+        filtered = list(self.processor.filter_logs(
+            logs, pattern=pattern, error_keywords=frozenset({'error 2'})
+        ))
+        
+        self.assertEqual(len(filtered), 1)
+        self.assertIn("Test error 2", filtered[0][1])
+    
+    def test_compile_pattern_re2(self):
+        """Test RE2 is used when available, with fallbacks to re."""
+        class FakeRe2:
+            def compile(self, pattern):
+                if '(?=' in pattern:
+                    raise ValueError('lookarounds are not supported')
+                return ('re2', pattern)
+        
+        with mock.patch('src.log_processor.re2', FakeRe2()):
+            self.assertEqual(LogProcessor.compile_pattern('error'), ('re2', '(?i)error'))
+            # Rejected by RE2: compiled with re instead
+            self.assertTrue(LogProcessor.compile_pattern('err(?=or)').search('ERROR'))
+            # Unicode classes stay on re, which matches them beyond ASCII
+            pattern = LogProcessor.compile_pattern(r'caf\w')
+            self.assertTrue(pattern.search('café'))
+            self.assertIsInstance(LogProcessor.compile_pattern(r'\\\d'), re.Pattern)
+            self.assertEqual(LogProcessor.compile_pattern(r'\\d'), ('re2', r'(?i)\\d'))
+    
+    def test_track_stats_streams_lines(self):
+        """Test stats are collected while lines pass through."""
+        stats = {}
+        logs = self.processor.track_stats(self.processor.read_logs(self.temp_path), stats)
+        filtered = list(self.processor.filter_logs(logs, pattern='ERROR'))
+        
+        self.assertEqual(len(filtered), 2)
+        self.assertEqual(stats['total_lines'], 3)
+        self.assertEqual(stats['with_timestamp'], 3)
+        self.assertEqual(stats, self.processor.get_stats(self.processor.read_logs(self.temp_path)))
+    
+    def test_stats_empty_log(self):
+        """Test an empty log reports a finite minimum line length."""
+        stats = self.processor.get_stats([])
+        
+        self.assertEqual(stats['total_lines'], 0)
+        self.assertEqual(stats['min_line_length'], 0)
+
+
+class TestWatcher(unittest.TestCase):
+    """Test incremental re-analysis in the watcher."""
+    
+    def setUp(self):
+        watcher._state.clear()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log = Path(self.temp_dir.name) / 'app.log'
+        self.output = Path(self.temp_dir.name) / 'output'
+    
+    def tearDown(self):
+        watcher._state.clear()
+        self.temp_dir.cleanup()
+    
+    def run_analysis(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            watcher.run_analysis(self.log, self.output)
+        return out.getvalue()
+    
+    def test_append_is_incremental(self):
+        """Test appended lines are merged into the previous results."""
+        self.log.write_text("ERROR: old alpha 1\nERROR: old beta 2\n")
+        self.run_analysis()
+        with open(self.log, 'a') as f:
+            f.write("ERROR: new gamma 3\n")
+        
+        self.assertIn("appended lines only", self.run_analysis())
+        self.assertEqual(watcher._state['stats']['total_lines'], 3)
+    
+    def test_truncate_and_regrow_is_reanalyzed(self):
+        """Test a rewrite that outgrows the old size is not merged as an append."""
+        self.log.write_text("ERROR: old alpha 1\nERROR: old beta 2\n")
+        self.run_analysis()
+        with open(self.log, 'r+') as f:
+            f.truncate(0)
+            f.write("ERROR: new gamma 3 " + "x" * 17 + "\nERROR: new delta 4\n")  # Newline at old end
+        
+        self.assertNotIn("appended lines only", self.run_analysis())
+        self.assertEqual(watcher._state['stats']['total_lines'], 2)
+        self.assertFalse(any('old' in sig for sig in watcher._state['clusters']))
 
 
 if __name__ == '__main__':
@@ -2,34 +2,169 @@
 watcher.py
 
 Simple file-watcher that reruns the analysis whenever the sample log changes.
-Uses a polling loop (no external dependencies) so it works on plain Python.
+On Linux it blocks on inotify (through ctypes, no external dependencies);
+elsewhere, or if inotify is unavailable, it falls back to a polling loop.
+Bursts of writes are debounced into one run, and the watch is re-added
+when the log is rotated (moved or deleted and created again).
+When the file has only been appended to, just the new lines are analyzed
+and merged into the previous results.
 
 Usage:
-  python watcher.py            # runs and watches indefinitely (poll every 2s)
+  python watcher.py            # runs and watches indefinitely
   python watcher.py --once     # run analysis once and exit
-  python watcher.py -i 5       # poll every 5 seconds
+  python watcher.py -i 5       # poll every 5 seconds when polling
+  python watcher.py -d 3       # re-run at most every 3 seconds on a busy log
 
 """
+import os
+import sys
 import time
+import select
+import struct
+import ctypes
 import argparse
 from pathlib import Path
 
 from main import ErrorLogClassifier
 
 
+# One classifier for the whole session keeps its compiled patterns warm
+_CLASSIFIER = ErrorLogClassifier()
+
+# What the last run covered, so appends only need the new bytes analyzed
+_state = {}
+
+
+# Bytes before the analyzed end that must be unchanged to resume from it
+_FINGERPRINT_SIZE = 4096
+
+
+def _fingerprint(logfile: Path, size: int) -> bytes:
+    """The last _FINGERPRINT_SIZE bytes of the file up to `size`."""
+    start = max(0, size - _FINGERPRINT_SIZE)
+    with open(logfile, 'rb') as f:
+        f.seek(start)
+        return f.read(size - start)
+
+
+def _can_resume(logfile: Path, st: os.stat_result) -> bool:
+    """
+    True if the file only grew since the last run, at a line boundary.
+
+    Same inode and a larger size are not enough: an in-place rewrite or a
+    copytruncate rotation can regrow past the old size. The bytes just
+    before the old end must also still match what was analyzed.
+    """
+    if not (
+        _state.get('path') == logfile
+        and _state.get('inode') == st.st_ino
+        and 0 < _state['size'] < st.st_size
+    ):
+        return False
+    tail = _fingerprint(logfile, _state['size'])
+    return tail == _state['fingerprint'] and tail.endswith(b'\n')
+
+
 def run_analysis(logfile: Path, output_dir: Path):
     print(f"[watcher] Running analysis for: {logfile}")
-    classifier = ErrorLogClassifier()
-    report, clusters = classifier.analyze_log_file(str(logfile))
-    classifier.export_results(report, str(output_dir))
+    st = logfile.stat()
+
+    if _can_resume(logfile, st):
+        print(f"[watcher] {st.st_size - _state['size']} new bytes, analyzing appended lines only")
+        new_clusters, new_stats = _CLASSIFIER.cluster_log_file(
+            str(logfile),
+            start_offset=_state['size'],
+            end_offset=st.st_size,
+            first_line_num=_state['stats'].get('total_lines', 0)
+        )
+        clusters = _state['clusters']
+        for signature, lines in new_clusters.items():
+            clusters.setdefault(signature, []).extend(lines)
+        stats = _CLASSIFIER.log_processor.merge_stats(_state['stats'], new_stats)
+    else:
+        clusters, stats = _CLASSIFIER.cluster_log_file(str(logfile), end_offset=st.st_size)
+
+    _state.update(path=logfile, inode=st.st_ino, size=st.st_size, clusters=clusters, stats=stats,
+                  fingerprint=_fingerprint(logfile, st.st_size))
+
+    report = _CLASSIFIER.report_gen.generate_summary(clusters, stats=stats)
+    _CLASSIFIER._display_summary(report)
+    _CLASSIFIER.export_results(report, str(output_dir))
     print(f"[watcher] Analysis complete. Results in: {output_dir}\n")
 
 
-def watch(logfile: Path, output_dir: Path, interval: float = 2.0, once: bool = False):
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _watch_inotify(logfile: Path, callback, debounce: float = 1.0) -> bool:
+    """
+    Block on inotify and call `callback` whenever the file is written.
+
+    After the first event of a burst it waits `debounce` seconds and drains
+    everything queued meanwhile, so a continuously written log triggers at
+    most one callback per `debounce` seconds. The callback also runs once
+    right after the watch is added, to catch writes made before it existed.
+
+    Returns True when the watch is lost (the file was moved or deleted, as
+    in log rotation), or False if inotify is unavailable, so the caller
+    can fall back to polling.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return False
+    if fd < 0:
+        return False
+
+    try:
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+        if libc.inotify_add_watch(fd, os.fsencode(logfile), mask) < 0:
+            return False
+        callback()
+
+        while True:
+            buf = os.read(fd, 4096)
+            # Let the burst settle, then take every event queued meanwhile
+            time.sleep(debounce)
+            while select.select([fd], [], [], 0)[0]:
+                buf += os.read(fd, 4096)
+
+            lost = False
+            offset = 0
+            while offset < len(buf):
+                _, event_mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size + name_len
+                if event_mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    lost = True
+
+            # One callback per debounced batch coalesces bursts of writes
+            callback()
+            if lost:
+                return True
+    finally:
+        os.close(fd)
+
+
+def _file_version(logfile: Path):
+    """Identify the file's content: a rotated file has a new inode."""
+    st = logfile.stat()
+    return st.st_ino, st.st_mtime
+
+
+def watch(logfile: Path, output_dir: Path, interval: float = 2.0, once: bool = False,
+          debounce: float = 1.0):
     if not logfile.exists():
         raise SystemExit(f"Log file not found: {logfile}")
 
-    last_mtime = logfile.stat().st_mtime
+    last_version = _file_version(logfile)
 
     # Run once immediately
     run_analysis(logfile, output_dir)
@@ -37,20 +172,32 @@ def watch(logfile: Path, output_dir: Path, interval: float = 2.0, once: bool = F
     if once:
         return
 
-    print(f"[watcher] Watching '{logfile}' for changes (interval={interval}s). Press Ctrl+C to stop.")
+    def check_for_change():
+        nonlocal last_version
+        try:
+            version = _file_version(logfile)
+        except FileNotFoundError:
+            print(f"[watcher] Log file removed: {logfile}")
+            return
+
+        if version != last_version:
+            last_version = version
+            print(f"[watcher] Change detected at {time.strftime('%Y-%m-%d %H:%M:%S')}, re-running analysis...")
+            run_analysis(logfile, output_dir)
+
     try:
+        if sys.platform.startswith('linux'):
+            print(f"[watcher] Watching '{logfile}' for changes (inotify). Press Ctrl+C to stop.")
+            while _watch_inotify(logfile, check_for_change, debounce):
+                print(f"[watcher] Log file moved or removed, waiting for '{logfile}' to reappear...")
+                while not logfile.exists():
+                    time.sleep(interval)
+            print("[watcher] inotify unavailable, falling back to polling.")
+
+        print(f"[watcher] Watching '{logfile}' for changes (interval={interval}s). Press Ctrl+C to stop.")
         while True:
             time.sleep(interval)
-            try:
-                mtime = logfile.stat().st_mtime
-            except FileNotFoundError:
-                print(f"[watcher] Log file removed: {logfile}")
-                continue
-
-            if mtime != last_mtime:
-                last_mtime = mtime
-                print(f"[watcher] Change detected at {time.strftime('%Y-%m-%d %H:%M:%S')}, re-running analysis...")
-                run_analysis(logfile, output_dir)
+            check_for_change()
 
     except KeyboardInterrupt:
         print('\n[watcher] Stopped by user.')
@@ -60,7 +207,8 @@ def main():
     parser = argparse.ArgumentParser(description='Watch a log file and auto-run analysis when it changes.')
     parser.add_argument('--log', '-l', default='data/sample_errors.log', help='Path to log file to watch')
     parser.add_argument('--output', '-o', default='output', help='Output directory for analysis results')
-    parser.add_argument('--interval', '-i', type=float, default=2.0, help='Polling interval in seconds')
+    parser.add_argument('--interval', '-i', type=float, default=2.0, help='Polling interval in seconds (used when inotify is unavailable)')
+    parser.add_argument('--debounce', '-d', type=float, default=1.0, help='Seconds to let a burst of writes settle before re-running (inotify)')
     parser.add_argument('--once', action='store_true', help='Run once and exit')
 
     args = parser.parse_args()
@@ -68,7 +216,7 @@ def main():
     logfile = Path(args.log)
     output_dir = Path(args.output)
 
-    watch(logfile, output_dir, interval=args.interval, once=args.once)
+    watch(logfile, output_dir, interval=args.interval, once=args.once, debounce=args.debounce)
 
 
 if __name__ == '__main__':